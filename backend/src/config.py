@@ -18,6 +18,10 @@ class Settings(BaseSettings):
     # Debrid Services
     real_debrid_token: str = Field(default="", alias="REAL_DEBRID_TOKEN")
     torbox_api_key: str = Field(default="", alias="TORBOX_API_KEY")
+    # Torbox is strict about parallel requests; raise with care
+    torbox_max_concurrency: int = Field(default=2, alias="TORBOX_MAX_CONCURRENCY")
+    # Set to false if Real-Debrid's edge doesn't negotiate HTTP/2 cleanly
+    real_debrid_http2: bool = Field(default=True, alias="REAL_DEBRID_HTTP2")
     
     # Media APIs
     tmdb_api_key: str = Field(default="", alias="TMDB_API_KEY")
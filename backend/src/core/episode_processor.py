@@ -56,8 +56,8 @@ class EpisodeProcessor:
         logger.info(f"🔍 Scanning mount for existing '{show.title}' episodes...")
         existing_files = {}
         
-        if mount_scanner.check_mount_available():
-            existing_files = mount_scanner.find_all_episodes_for_show(show.title)
+        if await mount_scanner.check_mount_available():
+            existing_files = await mount_scanner.find_all_episodes_for_show(show.title)
         else:
             logger.warning("Mount not available, skipping pre-scan")
         
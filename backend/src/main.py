@@ -12,6 +12,7 @@ from src.config import settings
 from src.database import init_db
 from src.routers import media, search, settings as settings_router, health
 from src.core.scheduler import scheduler
+from src.services.downloaders import downloader
 
 # Configure logging
 logger.remove()
@@ -43,6 +44,9 @@ async def lifespan(app: FastAPI):
     logger.info("🛑 Shutting down Torplex...")
     scheduler.shutdown()
     logger.info("✅ Scheduler stopped")
+    
+    # Let pending RD cleanup deletions finish before exit
+    await downloader.drain_background_tasks()
 
 
 app = FastAPI(
@@ -605,11 +605,11 @@ async def rescan_mount(
         raise HTTPException(status_code=400, detail="Not a TV show")
     
     # Check mount availability
-    if not mount_scanner.check_mount_available():
+    if not await mount_scanner.check_mount_available():
         raise HTTPException(status_code=503, detail="Mount not available")
     
     # Scan mount for existing files
-    existing_files = mount_scanner.find_all_episodes_for_show(show.title)
+    existing_files = await mount_scanner.find_all_episodes_for_show(show.title)
     
     if not existing_files:
         return {"message": "No existing files found in mount", "found": 0, "updated": 0}
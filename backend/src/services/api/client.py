@@ -1,8 +1,10 @@
 import asyncio
 import logging
+import random
 import time
 from typing import Optional, Any, Dict
 import aiohttp
+import orjson
 
 logger = logging.getLogger(__name__)
 
@@ -14,9 +16,18 @@ class RateLimitedClient:
     - Exponential backoff
     """
     
-    def __init__(self, name: str, max_concurrent: int = 3, base_url: str = ""):
+    def __init__(
+        self,
+        name: str,
+        max_concurrent: int = 3,
+        base_url: str = "",
+        headers: Optional[Dict[str, str]] = None
+    ):
         self.name = name
         self.base_url = base_url.rstrip('/')
+        # Joined per request, so build the prefix once
+        self._url_prefix = f"{self.base_url}/" if self.base_url else ""
+        self._default_headers = headers
         self._semaphore = asyncio.Semaphore(max_concurrent)
         self._session: Optional[aiohttp.ClientSession] = None
         self._last_429 = 0.0
@@ -24,16 +35,27 @@ class RateLimitedClient:
 
     async def _get_session(self) -> aiohttp.ClientSession:
         if not self._session or self._session.closed:
-            self._session = aiohttp.ClientSession()
+            # Keep connections (and their TLS sessions) alive between bursts of calls
+            connector = aiohttp.TCPConnector(limit=20, keepalive_timeout=60, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector, headers=self._default_headers)
         return self._session
 
     async def close(self):
         if self._session and not self._session.closed:
             await self._session.close()
+        self._session = None
 
-    async def request(self, method: str, endpoint: str, **kwargs) -> Optional[Any]:
+    async def __aenter__(self):
+        await self._get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def request(self, method: str, endpoint: str, *, raw: bool = False, **kwargs) -> Optional[Any]:
         """
         Execute an HTTP request with rate limiting and retries.
+        With raw=True the body is returned as text without JSON decoding.
         """
         # Respect global backoff (if multiple threads trigger detection)
         now = time.time()
@@ -46,7 +68,7 @@ class RateLimitedClient:
             retries = 3
             backoff = 2  # Start with 2 seconds
             
-            url = f"{self.base_url}/{endpoint.lstrip('/')}" if self.base_url else endpoint
+            url = self._url_prefix + endpoint.lstrip('/') if self._url_prefix else endpoint
 
             for attempt in range(retries):
                 try:
@@ -60,7 +82,8 @@ class RateLimitedClient:
                             
                             # Update global backoff
                             self._backoff_until = time.time() + retry_after
-                            await asyncio.sleep(retry_after)
+                            # Jitter so concurrent callers don't all retry on the same tick
+                            await asyncio.sleep(retry_after + random.uniform(0, 1))
                             
                             # Increase backoff for next loop if no header was present
                             backoff *= 2
@@ -69,15 +92,21 @@ class RateLimitedClient:
                         # Handle Server Errors
                         if response.status >= 500:
                             logger.warning(f"[{self.name}] Server error {response.status}. Retrying in {backoff}s...")
-                            await asyncio.sleep(backoff)
+                            await asyncio.sleep(backoff + random.uniform(0, 1))
                             backoff *= 2
                             continue
 
                         response.raise_for_status()
                         
+                        # Nothing to decode (e.g. delete operations)
+                        if response.status == 204 or response.content_length == 0:
+                            return {}
+                        
                         # Return JSON or Text based on content type
+                        if raw:
+                            return await response.text()
                         if "application/json" in response.headers.get("Content-Type", ""):
-                            return await response.json()
+                            return await response.json(loads=orjson.loads)
                         return await response.text()
 
                 except aiohttp.ClientResponseError as e:
@@ -88,7 +117,7 @@ class RateLimitedClient:
                 except Exception as e:
                     logger.error(f"[{self.name}] Connection error: {e}")
                     if attempt < retries - 1:
-                        await asyncio.sleep(backoff)
+                        await asyncio.sleep(backoff + random.uniform(0, 1))
                         backoff *= 2
                     else:
                         raise
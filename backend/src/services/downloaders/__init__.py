@@ -1,16 +1,51 @@
 """
 Downloaders Package
 Orchestrates Real-Debrid and Torbox for cache checking and downloads
+
+Provider calls fan out with asyncio (gather/as_completed). In production the
+loop is uvloop: uvicorn[standard] installs it and uvicorn's default
+`--loop auto` selects it, falling back to the stdlib loop when unavailable.
 """
-from typing import List, Dict, Optional, Tuple
+from typing import AsyncIterator, List, Dict, Optional, Set, Tuple
 from loguru import logger
 import asyncio
+import time
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
 
 from src.services.downloaders.realdebrid import real_debrid_service, RealDebridService
 from src.services.downloaders.torbox import torbox_service, TorboxService
 from src.services.scrapers.torrentio import TorrentResult
 
 
+# Strong references to fire-and-forget tasks so they aren't garbage collected mid-flight
+_background_tasks: Set[asyncio.Task] = set()
+
+# Video file extensions selected during RD instant checks (without the dot)
+_VIDEO_EXTS = frozenset({"mkv", "mp4", "avi", "mov", "m4v"})
+
+# Quality scoring for cached torrent selection
+_QUALITY_SCORES = {
+    "2160p": 400, "4K": 400, "UHD": 400,
+    "1080p": 300,
+    "720p": 200,
+    "480p": 100,
+}
+
+
+# x265/HEVC aliases (scrapers capture a single codec token per release)
+_HEVC_TOKENS = ("x265", "hevc", "h265", "h.265")
+
+
+@lru_cache(maxsize=64)
+def _codec_bonus(codec: Optional[str]) -> int:
+    """Codec score bonus (scrapers emit only a handful of distinct codec strings)"""
+    if not codec:
+        return 0
+    codec_lower = codec.lower()
+    return 50 if any(token in codec_lower for token in _HEVC_TOKENS) else 0
+
+
 class DownloaderOrchestrator:
     """
     Orchestrates multiple debrid services.
@@ -18,19 +53,70 @@ class DownloaderOrchestrator:
     Uses direct add-and-check for Real-Debrid (instant availability endpoint is disabled).
     """
     
+    # Short-lived memory of instant check results (browsing/refreshes re-check the same hashes)
+    INSTANT_CACHE_TTL = 60.0
+    INSTANT_CACHE_MAX = 1024
+    
     def __init__(self):
         self.real_debrid = real_debrid_service
         self.torbox = torbox_service
+        self._providers_cache: Optional[List[str]] = None
+        self._warned_rd_only = False
+        self._instant_cache: "OrderedDict[str, Tuple[float, Optional[Dict]]]" = OrderedDict()
     
     @property
     def available_providers(self) -> List[str]:
         """List of configured providers"""
-        providers = []
-        if self.real_debrid.is_configured:
-            providers.append("real_debrid")
+        if self._providers_cache is None:
+            providers = []
+            if self.real_debrid.is_configured:
+                providers.append("real_debrid")
+            if self.torbox.is_configured:
+                providers.append("torbox")
+            self._providers_cache = providers
+        return self._providers_cache
+    
+    async def check_cache_stream(
+        self, info_hashes: List[str]
+    ) -> AsyncIterator[Tuple[str, Dict[str, bool]]]:
+        """
+        Check cache status on available providers concurrently.
+        Yields (provider_name, {info_hash: is_cached}) as each provider answers,
+        so callers can act on the fastest provider without waiting for the slowest.
+        """
+        if not info_hashes:
+            return
+        
+        async def _check(provider: str, coro) -> Tuple[str, Dict[str, bool]]:
+            try:
+                return provider, await coro
+            except Exception as e:
+                logger.error(f"{provider} cache check failed: {e}")
+                return provider, {}
+        
+        tasks = []
+        
+        # Check Torbox instant availability (if configured)
         if self.torbox.is_configured:
-            providers.append("torbox")
-        return providers
+            tasks.append(_check("torbox", self.torbox.check_instant_availability(info_hashes)))
+        
+        # For Real-Debrid, we'll check via add-and-check when actually selecting torrents
+        # This is because RD's instant availability endpoint is disabled
+        # We mark them as potentially cached and verify during selection
+        if self.real_debrid.is_configured:
+            tasks.append(_check("real_debrid", self._mark_real_debrid_available(info_hashes)))
+        
+        for fut in asyncio.as_completed(tasks):
+            yield await fut
+    
+    async def _mark_real_debrid_available(self, info_hashes: List[str]) -> Dict[str, bool]:
+        """
+        OPTIMISTIC: Mark all hashes as available on Real-Debrid.
+        Rationale: User prefers RD (unlimited slots) over Torbox (limit 10).
+        Even if not cached, we want to try RD first.
+        """
+        logger.opt(lazy=True).debug("Marked {} hashes as potentially available on Real-Debrid", lambda: len(info_hashes))
+        return {h.lower(): True for h in info_hashes}
     
     async def check_cache_all(self, info_hashes: List[str]) -> Dict[str, List[str]]:
         """
@@ -42,35 +128,44 @@ class DownloaderOrchestrator:
         if not info_hashes:
             return {}
         
-        results: Dict[str, List[str]] = {h.lower(): [] for h in info_hashes}
+        # Without Torbox there is no network check to run: RD is marked
+        # optimistically (see _mark_real_debrid_available) and nothing else applies
+        if not self.torbox.is_configured:
+            if not self.real_debrid.is_configured:
+                return {}
+            if not self._warned_rd_only:
+                logger.warning(
+                    "Torbox not configured: no cache check available, "
+                    "Real-Debrid torrents are only verified via add-and-check"
+                )
+                self._warned_rd_only = True
+            return {h.lower(): ["real_debrid"] for h in info_hashes}
         
-        # Check Torbox instant availability (if configured)
-        if self.torbox.is_configured:
-            try:
-                torbox_results = await self.torbox.check_instant_availability(info_hashes)
-                for info_hash, is_cached in torbox_results.items():
-                    if is_cached:
-                        results[info_hash.lower()].append("torbox")
-            except Exception as e:
-                logger.error(f"Torbox cache check failed: {e}")
+        # Deduplicate (order-preserving) so providers never check the same hash twice
+        unique = list({h.lower(): None for h in info_hashes}.keys())
+        if len(unique) < len(info_hashes):
+            logger.opt(lazy=True).debug("Deduped {} hashes", lambda: len(info_hashes) - len(unique))
         
-        # For Real-Debrid, we'll check via add-and-check when actually selecting torrents
-        # This is because RD's instant availability endpoint is disabled
-        # We mark them as potentially cached and verify during selection
-        if self.real_debrid.is_configured:
-            # OPTIMISTIC: Mark all hashes as available on Real-Debrid.
-            # Rationale: User prefers RD (unlimited slots) over Torbox (limit 10).
-            # Even if not cached, we want to try RD first.
-            for h in info_hashes:
-                results[h.lower()].append("real_debrid")
-            logger.debug(f"Marked {len(info_hashes)} hashes as potentially available on Real-Debrid")
-        
-        # Log summary
-        cached_on_torbox = sum(1 for v in results.values() if "torbox" in v)
-        if cached_on_torbox > 0:
-            logger.info(f"Cache check: {cached_on_torbox}/{len(info_hashes)} cached on Torbox")
-        
-        return results
+        started = time.monotonic()
+        
+        # Only cache hits get an entry; callers look up misses with .get(h, [])
+        results: Dict[str, List[str]] = defaultdict(list)
+        
+        async for provider, provider_results in self.check_cache_stream(unique):
+            for info_hash, is_cached in provider_results.items():
+                if is_cached:
+                    # Providers key their results by the already-lowered hashes
+                    results[info_hash].append(provider)
+        
+        # Log a single summary for the whole batch
+        torbox_hits = [h for h, providers in results.items() if "torbox" in providers]
+        if torbox_hits:
+            logger.info(
+                f"Cache check: {len(torbox_hits)}/{len(unique)} cached on Torbox "
+                f"in {time.monotonic() - started:.2f}s; top: {', '.join(h[:8] for h in torbox_hits[:5])}"
+            )
+        
+        return dict(results)
     
     async def check_instant_via_add(self, info_hash: str) -> Optional[Dict]:
         """
@@ -84,58 +179,101 @@ class DownloaderOrchestrator:
         if not self.real_debrid.is_configured:
             return None
         
+        # Recent result for this hash? Saves ~4 RD calls and a duplicate add
+        key = info_hash.lower()
+        cached = self._instant_cache.get(key)
+        if cached and time.monotonic() - cached[0] < self.INSTANT_CACHE_TTL:
+            return cached[1]
+        
         torrent_id = None
-        try:
+        
+        # Returns (result, cacheable). Only verdicts backed by a real RD status are
+        # cacheable; None from add/info can be a 429/5xx/network blip, not "uncached".
+        async def _probe() -> Tuple[Optional[Dict], bool]:
+            nonlocal torrent_id
             torrent_id = await self.real_debrid.add_magnet(info_hash)
             if not torrent_id:
-                return None
+                return None, False
             
             info = await self.real_debrid.get_torrent_info(torrent_id)
             if not info:
-                if torrent_id:
-                    await self.real_debrid.delete_torrent(torrent_id)
-                return None
+                self._delete_in_background(torrent_id)
+                return None, False
+            
+            # Fast path: already cached, no file selection or re-fetch needed
+            if info.get("status") == "downloaded":
+                return self._instant_hit(torrent_id, info), True
             
             # If waiting for file selection, select video files
             if info.get("status") == "waiting_files_selection":
-                video_exts = ('.mkv', '.mp4', '.avi', '.mov', '.m4v')
                 video_ids = [
                     str(f["id"]) for f in info.get("files", [])
-                    if f.get("path", "").lower().endswith(video_exts)
+                    if f.get("path", "").rpartition(".")[2].lower() in _VIDEO_EXTS
                 ]
                 
                 if not video_ids:
-                    await self.real_debrid.delete_torrent(torrent_id)
-                    return None
+                    self._delete_in_background(torrent_id)
+                    return None, True
                 
                 await self.real_debrid.select_files(torrent_id, ",".join(video_ids))
                 info = await self.real_debrid.get_torrent_info(torrent_id)
+                if not info:
+                    self._delete_in_background(torrent_id)
+                    return None, False
+                
+                # Post-selection recheck
+                if info.get("status") == "downloaded":
+                    return self._instant_hit(torrent_id, info), True
             
-            # Check if instantly available
-            if info.get("status") == "downloaded":
-                logger.info(f"✅ Cached! {info.get('filename', '')[:40]}...")
-                return {
-                    "cached": True,
-                    "torrent_id": torrent_id,
-                    "filename": info.get("filename"),
-                    "files": info.get("files", []),
-                    "links": info.get("links", []),
-                }
-            
-            # Not cached - delete torrent
-            logger.debug(f"Not cached (status={info.get('status')}), deleting torrent")
-            await self.real_debrid.delete_torrent(torrent_id)
-            return None
-            
+            # Not cached - delete torrent (the caller doesn't need to wait for cleanup)
+            logger.opt(lazy=True).debug("Not cached (status={}), deleting torrent", lambda: info.get("status"))
+            self._delete_in_background(torrent_id)
+            return None, True
+        
+        # Not wrapped in wait_for: that would also count time queued on RD's rate-limit
+        # lock, and cancelling mid-addMagnet orphans the new torrent. Each HTTP call is
+        # bounded by the RD client's own timeout, which only starts once the lock is held.
+        try:
+            result, cacheable = await _probe()
+            if cacheable:
+                self._remember_instant(key, result)
+            return result
         except Exception as e:
             logger.error(f"Instant check failed for {info_hash[:8]}: {e}")
             if torrent_id:
-                try:
-                    await self.real_debrid.delete_torrent(torrent_id)
-                except:
-                    pass
+                self._delete_in_background(torrent_id)
             return None
     
+    @staticmethod
+    def _instant_hit(torrent_id: str, info: Dict) -> Dict:
+        """Result dict for a torrent RD reports as instantly available"""
+        logger.opt(lazy=True).debug("✅ Cached! {}...", lambda: info.get("filename", "")[:40])
+        return {
+            "cached": True,
+            "torrent_id": torrent_id,
+            "filename": info.get("filename"),
+            "files": info.get("files", []),
+            "links": info.get("links", []),
+        }
+    
+    def _remember_instant(self, key: str, result: Optional[Dict]):
+        """Store an instant check result, evicting the oldest entries past the size cap"""
+        self._instant_cache[key] = (time.monotonic(), result)
+        self._instant_cache.move_to_end(key)
+        while len(self._instant_cache) > self.INSTANT_CACHE_MAX:
+            self._instant_cache.popitem(last=False)
+    
+    def _delete_in_background(self, torrent_id: str):
+        """Schedule RD torrent deletion without blocking the caller"""
+        task = asyncio.create_task(self.real_debrid.delete_torrent(torrent_id))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+    
+    async def drain_background_tasks(self):
+        """Wait for pending fire-and-forget deletions (call before closing the RD client)"""
+        if _background_tasks:
+            await asyncio.gather(*_background_tasks, return_exceptions=True)
+    
     async def add_torrent(
         self,
         info_hash: Optional[str],
@@ -181,11 +319,17 @@ class DownloaderOrchestrator:
                         # Wait for torrent to be ready for file selection
                         # RD sometimes takes a moment to process metadata
                         max_retries = 5
+                        selection_failed = False
                         for _ in range(max_retries):
                             info = await self.real_debrid.get_torrent_info(torrent_id)
                             if info and info.get("status") == "waiting_files_selection":
                                 # Select all files so download starts automatically
-                                await self.real_debrid.select_files(torrent_id, "all")
+                                if not await self.real_debrid.select_files(torrent_id, "all"):
+                                    # Roll back rather than leave it stuck in "waiting_files_selection"
+                                    logger.warning(f"File selection failed for {torrent_id} on {provider_name}, removing torrent")
+                                    await self.real_debrid.delete_torrent(torrent_id)
+                                    selection_failed = True
+                                    break
                                 logger.info(f"Added torrent {info_hash[:8]}... to {provider_name} (files selected)")
                                 return provider_name, str(torrent_id)
                             
@@ -196,6 +340,9 @@ class DownloaderOrchestrator:
                                 
                             await asyncio.sleep(1)
                         
+                        if selection_failed:
+                            continue  # Try the next provider
+                        
                         # If we timed out or status is wrong, just return ID and hope for best?
                         # Or log warning.
                         logger.warning(f"Torrent {torrent_id} not ready for file selection after retries. Status: {info.get('status') if info else 'Unknown'}")
@@ -246,6 +393,26 @@ class DownloaderOrchestrator:
         return None, None
 
     
+    @staticmethod
+    def _score_default(item: Tuple[TorrentResult, List[str]]) -> int:
+        """Quality score for a (torrent, providers) candidate"""
+        torrent, providers = item
+        return (
+            _QUALITY_SCORES.get(torrent.resolution or "", 0)
+            + _codec_bonus(torrent.codec)
+            + (10 if "real_debrid" in providers else 0)  # Prefer Real-Debrid
+        )
+    
+    @staticmethod
+    def _score_anime(item: Tuple[TorrentResult, List[str]]) -> int:
+        """Quality score for a (torrent, providers) candidate, favouring dual-audio/dubbed"""
+        torrent, _ = item
+        return (
+            (1000 if torrent.is_dual_audio else 0)
+            + (500 if torrent.is_dubbed else 0)
+            + DownloaderOrchestrator._score_default(item)
+        )
+    
     async def get_best_cached_torrent(
         self,
         torrents: List[TorrentResult],
@@ -279,47 +446,19 @@ class DownloaderOrchestrator:
                 continue
             
             # Check torrent cache
-            if t.info_hash and cache_results.get(t.info_hash.lower()):
-                 cached_torrents.append((t, cache_results.get(t.info_hash.lower(), [])))
+            providers = cache_results.get(t.info_hash.lower()) if t.info_hash else None
+            if providers:
+                cached_torrents.append((t, providers))
         
         if not cached_torrents:
             return None, None
         
-        # Sort by quality
-        def sort_key(item):
-            torrent, providers = item
-            score = 0
-            
-            # Anime-specific scoring
-            if is_anime:
-                if torrent.is_dual_audio:
-                    score += 1000
-                if torrent.is_dubbed:
-                    score += 500
-            
-            # Quality scoring
-            quality_scores = {
-                "2160p": 400, "4K": 400, "UHD": 400,
-                "1080p": 300,
-                "720p": 200,
-                "480p": 100,
-            }
-            score += quality_scores.get(torrent.resolution or "", 0)
-            
-            # Codec scoring
-            if torrent.codec and "x265" in torrent.codec.lower():
-                score += 50
-            if torrent.codec and "hevc" in torrent.codec.lower():
-                score += 50
-            
-            # Prefer Real-Debrid
-            if "real_debrid" in providers:
-                score += 10
-            
-            return score
+        # is_anime is fixed for the whole pass, so pick the specialized scorer once
+        sort_key = self._score_anime if is_anime else self._score_default
         
-        cached_torrents.sort(key=sort_key, reverse=True)
-        best_torrent, providers = cached_torrents[0]
+        # Only the top candidate is used: a single O(n) pass scores each item once
+        # and, like the stable sort it replaces, keeps the earliest item on ties.
+        best_torrent, providers = max(cached_torrents, key=sort_key)
         
         # Prefer Real-Debrid if available
         best_provider = "real_debrid" if "real_debrid" in providers else providers[0]
@@ -4,33 +4,50 @@ Handles cache checking and torrent management on Real-Debrid
 """
 import httpx
 import asyncio
+import orjson
 from typing import Optional, List, Dict, Any
 from loguru import logger
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_result, stop_after_attempt, wait_exponential
 import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 
 from src.config import settings
 
 
+@lru_cache(maxsize=1024)
+def _magnet_for(info_hash: str) -> str:
+    """Canonical (lowercase hash) magnet URI, reused across retries and re-checks"""
+    return "magnet:?xt=urn:btih:" + info_hash.lower()
+
+
 class RealDebridService:
     """Service for interacting with Real-Debrid API"""
     
     BASE_URL = "https://api.real-debrid.com/rest/1.0"
     MIN_REQUEST_INTERVAL = 1.0  # Minimum seconds between API requests
+    CLEANUP_PAGE_SIZE = 100  # Torrents fetched per page during stale cleanup
     
     def __init__(self):
         self.api_key = settings.real_debrid_token
-        self.client = httpx.AsyncClient(timeout=30.0)
+        # API key is fixed at process start, so resolve this once
+        self._is_configured = bool(self.api_key)
+        # One pooled keep-alive client for all RD calls; auth header is set once here
+        self.client = httpx.AsyncClient(
+            http2=settings.real_debrid_http2,
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=60.0),
+            headers={"Authorization": f"Bearer {self.api_key}"},
+        )
         self._request_lock = asyncio.Lock()
+        
+        if self._is_configured:
+            logger.debug("Real-Debrid instant availability endpoint is disabled; cache is verified via add-and-check")
         self._last_request_time = 0.0
     
-    @property
-    def headers(self) -> Dict[str, str]:
-        return {"Authorization": f"Bearer {self.api_key}"}
-    
     @property
     def is_configured(self) -> bool:
-        return bool(self.api_key)
+        return self._is_configured
     
     async def _request(
         self,
@@ -61,7 +78,6 @@ class RealDebridService:
                 response = await self.client.request(
                     method,
                     url,
-                    headers=self.headers,
                     data=data,
                     params=params
                 )
@@ -75,19 +91,26 @@ class RealDebridService:
                     await asyncio.sleep(5)
                     # Retry once
                     response = await self.client.request(
-                        method, url, headers=self.headers, data=data, params=params
+                        method, url, data=data, params=params
                     )
                 
-                response.raise_for_status()
+                if 200 <= response.status_code < 300:
+                    content = response.content
+                    if not content:
+                        return {}
+                    try:
+                        # RD always answers UTF-8 JSON; orjson skips httpx's charset sniffing
+                        return orjson.loads(content)
+                    except orjson.JSONDecodeError:
+                        return response.json()
                 
-                if response.text:
-                    return response.json()
-                return {}
-                
-            except httpx.HTTPStatusError as e:
-                logger.error(f"Real-Debrid API error: {e.response.status_code} - {e.response.text}")
+                # Non-2xx (including 5xx) - log and bail out without raising
+                logger.error(f"Real-Debrid API error: {response.status_code} - {response.text[:200]}")
                 return None
-            except Exception as e:
+                
+            # ValueError covers a malformed body from the response.json() fallback;
+            # CancelledError and programming errors propagate
+            except (httpx.HTTPError, ValueError) as e:
                 logger.error(f"Real-Debrid request failed: {e}")
                 return None
     
@@ -107,9 +130,8 @@ class RealDebridService:
         if not info_hashes:
             return {}
         
-        # Skip cache check - endpoint disabled by Real-Debrid
+        # Skip cache check - endpoint disabled by Real-Debrid (logged once at init)
         # All torrents will be tried, cached ones will complete instantly
-        logger.debug(f"Skipping cache check (endpoint disabled) for {len(info_hashes)} hashes")
         return {h.lower(): False for h in info_hashes}
 
     
@@ -119,9 +141,7 @@ class RealDebridService:
         Add magnet link to Real-Debrid.
         Returns the torrent ID if successful.
         """
-        magnet = f"magnet:?xt=urn:btih:{info_hash}"
-        
-        result = await self._request("POST", "/torrents/addMagnet", data={"magnet": magnet})
+        result = await self._request("POST", "/torrents/addMagnet", data={"magnet": _magnet_for(info_hash)})
         
         if result and "id" in result:
             logger.info(f"Real-Debrid: Added torrent {info_hash[:8]}... -> ID: {result['id']}")
@@ -133,6 +153,13 @@ class RealDebridService:
         """Get torrent info including files"""
         return await self._request("GET", f"/torrents/info/{torrent_id}")
     
+    # _request returns None instead of raising, so retry on a failed (False) result
+    @retry(
+        retry=retry_if_result(lambda ok: not ok),
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry_error_callback=lambda state: state.outcome.result(),
+    )
     async def select_files(self, torrent_id: str, file_ids: str = "all") -> bool:
         """
         Select files to download.
@@ -150,6 +177,12 @@ class RealDebridService:
         result = await self._request("GET", "/torrents")
         return result if result else []
     
+    async def get_torrents_page(self, page: int, limit: int = 100) -> List[Dict]:
+        """Get one page of user's torrents (newest first)"""
+        result = await self._request("GET", "/torrents", params={"page": page, "limit": limit})
+        # RD answers 204 (empty body) past the last page
+        return result if isinstance(result, list) else []
+    
     async def delete_torrent(self, torrent_id: str) -> bool:
         """Delete a torrent"""
         result = await self._request("DELETE", f"/torrents/delete/{torrent_id}")
@@ -160,50 +193,60 @@ class RealDebridService:
         Delete torrents stuck at 0% progress for longer than max_age_hours.
         Returns the number of deleted torrents.
         """
-        from datetime import datetime, timezone
-        from dateutil.parser import parse as parse_datetime
-        
         if not self.is_configured:
             return 0
         
-        torrents = await self.get_torrents()
-        if not torrents:
-            return 0
-        
-        deleted_count = 0
         now = datetime.now(timezone.utc)
+        cutoff = now - timedelta(hours=max_age_hours)
         
-        for torrent in torrents:
-            try:
-                progress = torrent.get("progress", 100)
-                
-                # Only check torrents at 0% progress
-                if progress != 0:
-                    continue
-                
-                # Parse the added date
-                added_str = torrent.get("added")
-                if not added_str:
-                    continue
-                
-                added_time = parse_datetime(added_str)
-                if added_time.tzinfo is None:
-                    added_time = added_time.replace(tzinfo=timezone.utc)
-                
-                # Calculate age in hours
-                age_hours = (now - added_time).total_seconds() / 3600
-                
-                if age_hours > max_age_hours:
-                    torrent_id = torrent.get("id")
-                    filename = torrent.get("filename", "unknown")[:50]
+        # Pass 1: page through torrents and collect stale ones (deleting while
+        # paging would shift later pages, so deletion waits until the end)
+        stale = []
+        page = 1
+        while True:
+            torrents = await self.get_torrents_page(page, self.CLEANUP_PAGE_SIZE)
+            
+            for torrent in torrents:
+                try:
+                    progress = torrent.get("progress", 100)
+                    
+                    # Only check torrents at 0% progress
+                    if progress != 0:
+                        continue
+                    
+                    # Parse the added date
+                    added_str = torrent.get("added")
+                    if not added_str:
+                        continue
                     
-                    success = await self.delete_torrent(torrent_id)
-                    if success:
-                        deleted_count += 1
-                        logger.info(f"Cleaned up stale torrent (stuck {age_hours:.1f}h at 0%): {filename}...")
+                    # RD returns ISO-8601 (e.g. "2024-01-01T12:00:00.000Z")
+                    added_time = datetime.fromisoformat(added_str)
+                    if added_time.tzinfo is None:
+                        added_time = added_time.replace(tzinfo=timezone.utc)
+                    
+                    if added_time < cutoff:
+                        age_hours = (now - added_time).total_seconds() / 3600
+                        stale.append((torrent.get("id"), torrent.get("filename", "unknown")[:50], age_hours))
                         
+                except Exception as e:
+                    logger.debug(f"Error checking torrent for cleanup: {e}")
+            
+            if len(torrents) < self.CLEANUP_PAGE_SIZE:
+                break
+            page += 1
+        
+        if not stale:
+            return 0
+        
+        # Pass 2: delete one at a time; _request already serializes RD calls at ~1/s
+        deleted_count = 0
+        for torrent_id, filename, age_hours in stale:
+            try:
+                if await self.delete_torrent(torrent_id):
+                    deleted_count += 1
+                    logger.info(f"Cleaned up stale torrent (stuck {age_hours:.1f}h at 0%): {filename}...")
             except Exception as e:
-                logger.debug(f"Error checking torrent for cleanup: {e}")
+                logger.warning(f"Failed to delete stale torrent {torrent_id}: {e}")
         
         return deleted_count
     
@@ -2,16 +2,31 @@
 Torbox Downloader Service
 Handles cache checking and torrent management on Torbox
 """
-import httpx
-from typing import Optional, List, Dict, Any
+import asyncio
+import re
+import time
+import httpx # For downloading NZBs from Prowlarr (not the Torbox API)
+import orjson
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any, Tuple
+from urllib.parse import quote_plus
 from loguru import logger
-import httpx # Still needed for downloading NZB from Prowlarr
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
 import aiohttp # Needed for FormData in add_usenet
 
 from src.config import settings
 from src.services.api.client import RateLimitedClient
 
+def _is_transient(e: BaseException) -> bool:
+    """Prowlarr network failures and 5xx responses; 4xx/bad NZBs would fail the same way again"""
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code >= 500
+    return isinstance(e, httpx.TransportError)
+
+# Info hash in a magnet URI; a-z rather than a-f so base32 hashes match too
+_BTIH_RE = re.compile(r'btih:([a-z0-9]+)', re.I)
+
 
 class TorboxService(RateLimitedClient):
     """
@@ -20,20 +35,43 @@ class TorboxService(RateLimitedClient):
     """
     
     BASE_URL = "https://api.torbox.app/v1/api"
+    LIST_CACHE_TTL = 3.0  # seconds; coalesces bursts of list polls
+    CHECK_BATCH_SIZE = 50  # hashes per comma-joined checkcached request
+    CHECK_CACHE_TTL = 60.0  # seconds to remember a checkcached answer
+    CHECK_CACHE_MAX = 4096
     
     def __init__(self):
         self.api_key = settings.torbox_api_key
+        # API key is fixed at process start, so resolve this once
+        self._is_configured = bool(self.api_key)
         # Initialize RateLimitedClient with name and concurrency limit
-        # Torbox limit is usually strict -> limit to 2 concurrent requests
-        super().__init__(name="Torbox", max_concurrent=2, base_url=self.BASE_URL)
-    
-    @property
-    def headers(self) -> Dict[str, str]:
-        return {"Authorization": f"Bearer {self.api_key}"}
+        # Torbox limit is usually strict -> default to 2 concurrent requests
+        # Auth header is set once on the session instead of per request
+        super().__init__(
+            name="Torbox",
+            max_concurrent=settings.torbox_max_concurrency,
+            base_url=self.BASE_URL,
+            headers={"Authorization": f"Bearer {self.api_key}"} if self.api_key else None,
+        )
+        # endpoint -> (fetched_at, rows); invalidated whenever we add or delete
+        self._list_cache: Dict[str, tuple] = {}
+        self._list_locks: Dict[str, asyncio.Lock] = {}
+        # Bumped on every invalidation so a fetch that raced a mutation isn't stored
+        self._list_generation = 0
+        # (endpoint, hash) -> (checked_at, is_cached), oldest first
+        self._check_cache: "OrderedDict[Tuple[str, str], Tuple[float, bool]]" = OrderedDict()
+        # Pooled client for fetching NZBs from Prowlarr (not the Torbox API),
+        # so repeated usenet adds reuse the connection instead of reconnecting
+        self._dl_client = httpx.AsyncClient(
+            verify=False,
+            timeout=30.0,
+            http2=True,  # Multiplexes concurrent fetches when Prowlarr sits behind an HTTPS proxy
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0)
+        )
     
     @property
     def is_configured(self) -> bool:
-        return bool(self.api_key)
+        return self._is_configured
     
     async def _request_api(
         self,
@@ -45,17 +83,18 @@ class TorboxService(RateLimitedClient):
         form_data: Optional[aiohttp.FormData] = None # For multipart form data (aiohttp)
     ) -> Optional[Any]:
         """Wrapper for RateLimitedClient.request with Torbox-specific error handling"""
-        if not self.is_configured:
+        # Plain attribute read (no property lookup) on this per-request path
+        if not self._is_configured:
             logger.warning("Torbox API key not configured")
             return None
             
         try:
-            # Prepare headers
-            req_headers = self.headers.copy()
-            
             # Prepare args for aiohttp
             # aiohttp uses 'json' for json body, 'data' for form/multipart
-            kwargs = {"headers": req_headers, "params": params}
+            # Only pass what's set so aiohttp skips the None handling
+            kwargs = {}
+            if params:
+                kwargs["params"] = params
             if json_data:
                 kwargs["json"] = json_data
             if data: # For simple form-urlencoded data
@@ -87,10 +126,166 @@ class TorboxService(RateLimitedClient):
                 
             return response_data
 
-        except Exception as e:
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
             logger.error(f"Torbox request failed: {e}")
             return None
     
+    async def _get_list_cached(self, endpoint: str) -> List[Dict]:
+        """
+        Fetch a mylist endpoint, serving repeat calls within LIST_CACHE_TTL from memory.
+        Concurrent callers share a single in-flight request.
+        Callers get their own copy, so mutating it can't corrupt the cache.
+        """
+        cached = self._list_cache.get(endpoint)
+        if cached and time.monotonic() - cached[0] < self.LIST_CACHE_TTL:
+            return list(cached[1])
+        
+        lock = self._list_locks.setdefault(endpoint, asyncio.Lock())
+        async with lock:
+            # Another caller may have refreshed it while we waited
+            cached = self._list_cache.get(endpoint)
+            if cached and time.monotonic() - cached[0] < self.LIST_CACHE_TTL:
+                return list(cached[1])
+            
+            generation = self._list_generation
+            result = await self._request_api("GET", endpoint)
+            if not isinstance(result, list):
+                return []  # Don't cache failures
+            # An add/delete during the fetch means this list may already be stale
+            if generation == self._list_generation:
+                self._list_cache[endpoint] = (time.monotonic(), result)
+            return list(result)
+    
+    def _invalidate_lists(self):
+        """Drop cached mylist results after a mutation"""
+        self._list_cache.clear()
+        self._list_generation += 1
+    
+    async def _request_link(self, endpoint: str, params: Dict) -> Optional[str]:
+        """
+        Fetch a requestdl URL without building the full response envelope.
+        A bare URL body is returned as-is; otherwise the JSON is decoded and unwrapped.
+        """
+        if not self._is_configured:
+            logger.warning("Torbox API key not configured")
+            return None
+        
+        try:
+            body = await self.request("GET", endpoint, params=params, raw=True)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.error(f"Torbox request failed: {e}")
+            return None
+        
+        if not body:
+            return None
+        body = body.strip()
+        if body.startswith("http"):
+            return body
+        
+        try:
+            result = orjson.loads(body)
+        except orjson.JSONDecodeError:
+            logger.error(f"Torbox returned an unexpected download link body: {body[:200]}")
+            return None
+        
+        if isinstance(result, dict):
+            if result.get("success") is False:
+                error = result.get("error", result.get("detail", "Unknown error"))
+                logger.error(f"Torbox API logical error: {error}")
+                return None
+            result = result.get("data", result)
+        if isinstance(result, str):
+            return result
+        if isinstance(result, dict):
+            return result.get("url") or result.get("data")
+        return None
+    
+    @staticmethod
+    def _is_cached_result(result: Any, hash_key: str) -> bool:
+        """
+        Interpret a checkcached response for one hash.
+        Torbox returns either a list of cached entries, a {hash: ...} map, or a raw boolean.
+        """
+        if not result or isinstance(result, Exception):
+            return False
+        if isinstance(result, list):
+            return len(result) > 0
+        if isinstance(result, dict):
+            return result.get(hash_key) is True
+        return result is True
+    
+    async def _check_cached_batch(self, endpoint: str, batch: List[str]) -> Optional[Dict[str, bool]]:
+        """
+        Check a batch of hashes with one comma-joined request.
+        Returns None when the response shape isn't usable so the caller can fall back.
+        """
+        result = await self._request_api("GET", endpoint, params={"hash": ",".join(batch)})
+        if isinstance(result, list):
+            present = {(entry.get("hash") or "").lower() for entry in result if isinstance(entry, dict)}
+        elif isinstance(result, dict):
+            present = {key.lower() for key, value in result.items() if value}
+        else:
+            return None
+        return {h: h.lower() in present for h in batch}
+    
+    async def _check_cached(self, endpoint: str, hashes: List[str]) -> Dict[str, bool]:
+        """
+        Check hashes against a checkcached endpoint in batches of CHECK_BATCH_SIZE,
+        falling back to one request per hash for any batch that fails.
+        Answers seen within CHECK_CACHE_TTL are served from memory.
+        """
+        now = time.monotonic()
+        cached_status = {}
+        misses = []
+        for h in hashes:
+            hit = self._check_cache.get((endpoint, h))
+            if hit and now - hit[0] < self.CHECK_CACHE_TTL:
+                cached_status[h] = hit[1]
+            else:
+                misses.append(h)
+        if not misses:
+            return cached_status
+        
+        batches = [misses[i:i + self.CHECK_BATCH_SIZE] for i in range(0, len(misses), self.CHECK_BATCH_SIZE)]
+        batch_results = await asyncio.gather(
+            *[self._check_cached_batch(endpoint, batch) for batch in batches],
+            return_exceptions=True
+        )
+        
+        fresh = {}
+        fallback = []
+        for batch, result in zip(batches, batch_results):
+            if isinstance(result, dict):
+                fresh.update(result)
+            else:
+                fallback.extend(batch)
+        
+        if fallback:
+            # Fan out concurrently; RateLimitedClient's semaphore bounds in-flight requests
+            results = await asyncio.gather(
+                *[self._request_api("GET", endpoint, params={"hash": h}) for h in fallback],
+                return_exceptions=True
+            )
+            for h, result in zip(fallback, results):
+                if result is None or isinstance(result, Exception):
+                    cached_status[h] = False  # Failed lookup; don't remember it
+                else:
+                    fresh[h] = self._is_cached_result(result, h)
+        
+        self._remember_checks(endpoint, fresh)
+        cached_status.update(fresh)
+        return cached_status
+    
+    def _remember_checks(self, endpoint: str, results: Dict[str, bool]):
+        """Store checkcached answers, evicting the oldest past CHECK_CACHE_MAX"""
+        now = time.monotonic()
+        for h, is_cached in results.items():
+            key = (endpoint, h)
+            self._check_cache[key] = (now, is_cached)
+            self._check_cache.move_to_end(key)
+        while len(self._check_cache) > self.CHECK_CACHE_MAX:
+            self._check_cache.popitem(last=False)
+    
     async def get_user_info(self) -> Optional[Dict]:
         """Get user account info"""
         return await self._request_api("GET", "/user/me")
@@ -100,44 +295,22 @@ class TorboxService(RateLimitedClient):
         if not info_hashes:
             return {}
         
-        cached_status = {}
-        for info_hash in info_hashes:
-            # This is the loop causing issues. RateLimitedClient will slow it down.
-            result = await self._request_api(
-                "GET",
-                "/torrents/checkcached",
-                params={"hash": info_hash.lower()}
-            )
-            
-            # Torbox checkcached returns boolean list or similar truthy value?
-            # It usually returns: { "data": { "hash": true/false }, "success": true } OR list
-            # Based on previous code: "if result and isinstance(result, list)..."
-            # Let's stricter check:
-            # API documentation says it returns list of cached hashes? 
-            # Or map?
-            # Previous implementation:
-            # if result and isinstance(result, list) and len(result) > 0: -> True
-            is_cached = False
-            if result: 
-                if isinstance(result, list) and len(result) > 0:
-                    is_cached = True
-                elif isinstance(result, dict) and result.get(info_hash.lower()) is True:
-                    is_cached = True
-                elif result is True: # If API returns raw boolean
-                    is_cached = True
-                     
-            cached_status[info_hash.lower()] = is_cached
-        
-        cached_count = sum(1 for v in cached_status.values() if v)
+        # One request per unique hash (callers often pass duplicates from merged pages)
+        unique = list(dict.fromkeys(h.lower() for h in info_hashes))
+        
+        cached_status = await self._check_cached("/torrents/checkcached", unique)
+        
+        cached_count = sum(cached_status.values())  # bools sum as ints
         logger.debug(f"Torbox: {cached_count}/{len(info_hashes)} torrents cached")
         return cached_status
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=2, min=4, max=20))
     async def add_magnet(self, info_hash: str, name: Optional[str] = None) -> Optional[int]:
-        """Add magnet link to Torbox."""
-        magnet = f"magnet:?xt=urn:btih:{info_hash}"
-        if name:
-            magnet += f"&dn={name}"
+        """
+        Add magnet link to Torbox.
+        Transient failures are already retried with backoff by RateLimitedClient.
+        """
+        # dn must be URL-encoded; raw '&', spaces or unicode produce an invalid URI
+        magnet = f"magnet:?xt=urn:btih:{info_hash}" + (f"&dn={quote_plus(name)}" if name else "")
         
         # Using form data
         result = await self._request_api(
@@ -147,87 +320,96 @@ class TorboxService(RateLimitedClient):
         )
         
         if result and isinstance(result, dict) and "torrent_id" in result:
+            self._invalidate_lists()
             logger.info(f"Torbox: Added torrent {info_hash[:8]}... -> ID: {result['torrent_id']}")
             return result["torrent_id"]
         return None
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=2, min=4, max=20))
-    async def add_usenet(self, download_url: str, name: Optional[str] = None) -> Optional[int]:
+    # Prowlarr isn't behind RateLimitedClient, so only this fetch needs its own retry
+    @retry(
+        retry=retry_if_exception(_is_transient),
+        stop=stop_after_attempt(3),
+        wait=wait_exponential_jitter(initial=4, max=20, jitter=2),
+        reraise=True,
+    )
+    async def _fetch_nzb(self, download_url: str) -> Tuple[Optional[bytes], Optional[str]]:
         """
-        Add Usenet (NZB) to Torbox via File Upload.
-        This uses `httpx` for the *download* part (not IO bound/rate limited by Torbox),
-        but then implementation uploads to Torbox.
+        Download an NZB (or .torrent) from Prowlarr.
+        Returns (content, None), or (None, info_hash) when Prowlarr redirects to a magnet link.
+        Uses `httpx` since this is not the Torbox API (not rate limited by Torbox).
         """
-        try:
-            # 1. Download NZB content locally (from Prowlarr)
-            # Use raw httpx for this as it's not Torbox API
-            logger.debug(f"Downloading NZB from Prowlarr: {download_url}")
-            async with httpx.AsyncClient(verify=False, timeout=30.0) as dl_client:
-                # Handle redirects manually to catch magnet links
-                resp = await dl_client.get(download_url, follow_redirects=False)
-                
-                # Check for redirect to magnet
-                if resp.status_code in (301, 302, 303, 307, 308) and "location" in resp.headers:
-                    location = resp.headers["location"]
-                    if location.startswith("magnet:"):
-                        logger.info(f"Prowlarr redirected to magnet link. Switching to add_magnet.")
-                        import re
-                        hash_match = re.search(r'btih:([a-zA-Z0-9]+)', location)
-                        if hash_match:
-                            return await self.add_magnet(hash_match.group(1), name)
-                        return None
-                            
-                    # Follow HTTP redirect
-                    resp = await dl_client.get(location, follow_redirects=True)
-                
+        logger.debug(f"Downloading NZB from Prowlarr: {download_url}")
+        # Handle redirects manually to catch magnet links; stream so a redirect's body is never read
+        async with self._dl_client.stream("GET", download_url, follow_redirects=False) as resp:
+            if resp.status_code not in (301, 302, 303, 307, 308) or "location" not in resp.headers:
+                await resp.aread()
                 resp.raise_for_status()
-                file_content = resp.content
-                
-                # Determine filename
-                filename = "download.nzb"
-                if name:
-                     safe_name = "".join(c for c in name if c.isalnum() or c in (' ', '-', '_', '.')).strip()
-                     filename = f"{safe_name}.nzb" if not safe_name.lower().endswith(".nzb") else safe_name
-
-            # 2. Upload file to Torbox (Usenet) using new RateLimitedClient
-            # Since RateLimitedClient uses aiohttp, we pass 'data' with MultipartWriter logic or simple FormData
-            
-            # Prepare MultiPart
-            form_data = aiohttp.FormData()
-            
-            # Determine correct endpoint based on file type (nzb or torrent)
-            target_url = "/usenet/createusenetdownload"
-            field_name = "file"
-            
-            is_torrent = False
-            # Basic check for torrent file signature 'd8:announce' or filename
-            if filename.endswith(".torrent") or file_content.startswith(b'd8:announce'):
-                logger.info("Detected .torrent file from Prowlarr, switching to torrent upload")
-                target_url = "/torrents/createtorrent"
-                is_torrent = True
-                
-            # Add file field
-            form_data.add_field(field_name, file_content, filename=filename, content_type='application/x-nzb' if not is_torrent else 'application/x-bittorrent')
-            
-            if name and not is_torrent: # Name is not directly supported for torrent file upload
-                form_data.add_field("name", name)
-                
-            # Use raw request to handle FormData correctly if needed, or update _request_api
-            # _request_api handles 'data' kwarg which aiohttp accepts for FormData
-            result = await self._request_api("POST", target_url, form_data=form_data)
+                return resp.content, None
             
-            if result:
-                # Handle differenct ID fields
-                t_id = result.get("torrent_id") or result.get("usenetdownload_id") or result.get("id")
-                if t_id:
-                     logger.info(f"Torbox: Uploaded file -> ID: {t_id}")
-                     return t_id
+            location = resp.headers["location"]
+            # Check for redirect to magnet
+            if location.startswith("magnet:"):
+                logger.info(f"Prowlarr redirected to magnet link. Switching to add_magnet.")
+                hash_match = _BTIH_RE.search(location)
+                return None, hash_match.group(1).lower() if hash_match else None
+        
+        # Follow HTTP redirect
+        resp = await self._dl_client.get(location, follow_redirects=True)
+        resp.raise_for_status()
+        return resp.content, None
+    
+    async def _upload_nzb(self, file_content: bytes, name: Optional[str] = None) -> Optional[int]:
+        """Upload a downloaded NZB (or .torrent) file to Torbox"""
+        # Determine file type once (torrent signature 'd8:announce'); everything else follows from it
+        is_torrent = file_content.startswith(b'd8:announce')
+        if is_torrent:
+            logger.info("Detected .torrent file from Prowlarr, switching to torrent upload")
+            target_url, content_type, ext = "/torrents/createtorrent", "application/x-bittorrent", ".torrent"
+        else:
+            target_url, content_type, ext = "/usenet/createusenetdownload", "application/x-nzb", ".nzb"
+        
+        # Determine filename
+        filename = f"download{ext}"
+        if name:
+             safe_name = "".join(c for c in name if c.isalnum() or c in (' ', '-', '_', '.')).strip()
+             filename = safe_name if safe_name.lower().endswith(ext) else f"{safe_name}{ext}"
+
+        # Since RateLimitedClient uses aiohttp, we pass multipart FormData
+        form_data = aiohttp.FormData()
+        form_data.add_field("file", file_content, filename=filename, content_type=content_type)
+        
+        if name and not is_torrent: # Name is not directly supported for torrent file upload
+            form_data.add_field("name", name)
             
-            return None
+        # _request_api handles 'data' kwarg which aiohttp accepts for FormData
+        result = await self._request_api("POST", target_url, form_data=form_data)
+        
+        if result:
+            # Handle differenct ID fields
+            t_id = result.get("torrent_id") or result.get("usenetdownload_id") or result.get("id")
+            if t_id:
+                 self._invalidate_lists()
+                 logger.info(f"Torbox: Uploaded file -> ID: {t_id}")
+                 return t_id
+        
+        return None
+    
+    async def add_usenet(self, download_url: str, name: Optional[str] = None) -> Optional[int]:
+        """
+        Add Usenet (NZB) to Torbox via File Upload.
+        Downloads the NZB from Prowlarr, then uploads it to Torbox.
+        """
+        try:
+            file_content, magnet_hash = await self._fetch_nzb(download_url)
+            if magnet_hash:
+                return await self.add_magnet(magnet_hash, name)
+            if file_content is None:
+                return None
+            return await self._upload_nzb(file_content, name)
 
         except Exception as e:
             logger.error(f"Failed to process NZB add: {e}")
-            raise e # Re-raise to allow @retry to catch it
+            return None
     
     async def get_torrent_info(self, torrent_id: int) -> Optional[Dict]:
         """Get torrent info including files"""
@@ -239,10 +421,7 @@ class TorboxService(RateLimitedClient):
     
     async def get_torrents(self) -> List[Dict]:
         """Get list of user's torrents"""
-        result = await self._request_api("GET", "/torrents/mylist")
-        # Ensure list
-        if isinstance(result, list): return result
-        return []
+        return await self._get_list_cached("/torrents/mylist")
     
     async def delete_torrent(self, torrent_id: int) -> bool:
         """Delete a torrent"""
@@ -251,6 +430,7 @@ class TorboxService(RateLimitedClient):
             "/torrents/controltorrent",
             data={"torrent_id": str(torrent_id), "operation": "delete"}
         )
+        self._invalidate_lists()
         return result is not None
     
     async def get_download_link(self, torrent_id: int, file_id: Optional[int] = None) -> Optional[str]:
@@ -261,17 +441,8 @@ class TorboxService(RateLimitedClient):
         if file_id:
             params["file_id"] = file_id
         
-        # Use simple request since this returns string/url usually
-        # But _request_api expects JSON/Dict...
-        # Let's bypass _request_api for this specific text return if needed, but RateLimitedClient returns text if not json
-        # Our _request_api wrapper tries to handle JSON structure.
-        # Assuming requestdl returns JSON with 'data' = url or 'url' key?
-        # Documentation: usually returns JSON { success: true, data: "url" }
-        result = await self._request_api("GET", "/torrents/requestdl", params=params)
-        
-        if isinstance(result, str): return result
-        if isinstance(result, dict): return result.get("url") or result.get("data")
-        return None
+        # requestdl returns { success: true, data: "url" } or occasionally a bare URL
+        return await self._request_link("/torrents/requestdl", params)
     
     async def add_and_wait_for_ready(self, info_hash: str, name: Optional[str] = None) -> Optional[Dict]:
         """
@@ -282,17 +453,13 @@ class TorboxService(RateLimitedClient):
             return None
         
         # Get torrent info
-        info = await self.get_torrent_info(torrent_id)
-        return info
+        return await self.get_torrent_info(torrent_id)
 
     async def cleanup_stale_torrents(self, max_age_hours: int = 24) -> int:
         """
         Delete torrents stuck at 0% progress for longer than max_age_hours.
         Returns the number of deleted torrents.
         """
-        from datetime import datetime, timezone
-        from dateutil.parser import parse as parse_datetime
-        
         if not self.is_configured:
             return 0
         
@@ -300,9 +467,11 @@ class TorboxService(RateLimitedClient):
         if not torrents:
             return 0
         
-        deleted_count = 0
         now = datetime.now(timezone.utc)
+        cutoff = now - timedelta(hours=max_age_hours)
         
+        # Pass 1: collect stale torrents (no awaits)
+        stale = []
         for torrent in torrents:
             try:
                 # Torbox structure might differ, checking common fields
@@ -317,25 +486,40 @@ class TorboxService(RateLimitedClient):
                 if not added_str:
                     continue
                 
-                added_time = parse_datetime(added_str)
+                try:
+                    # Torbox emits ISO-8601; fromisoformat handles that (incl. "Z") on 3.11+
+                    added_time = datetime.fromisoformat(added_str)
+                except ValueError:
+                    from dateutil.parser import parse as parse_datetime
+                    added_time = parse_datetime(added_str)
                 if added_time.tzinfo is None:
                     added_time = added_time.replace(tzinfo=timezone.utc)
                 
-                # Calculate age in hours
-                age_hours = (now - added_time).total_seconds() / 3600
-                
-                if age_hours > max_age_hours:
-                    torrent_id = torrent.get("id")
-                    name = torrent.get("name", "unknown")[:50]
-                    
-                    success = await self.delete_torrent(torrent_id)
-                    if success:
-                        deleted_count += 1
-                        logger.info(f"Cleaned up stale Torbox torrent (stuck {age_hours:.1f}h): {name}...")
+                # Compare against a precomputed cutoff; age is only needed for the log
+                if added_time < cutoff:
+                    age_hours = (now - added_time).total_seconds() / 3600
+                    stale.append((torrent.get("id"), torrent.get("name", "unknown")[:50], age_hours))
                         
             except Exception as e:
                 logger.debug(f"Error checking Torbox torrent for cleanup: {e}")
         
+        if not stale:
+            return 0
+        
+        # Pass 2: delete concurrently; RateLimitedClient's semaphore bounds in-flight requests
+        results = await asyncio.gather(
+            *(self.delete_torrent(torrent_id) for torrent_id, _, _ in stale),
+            return_exceptions=True
+        )
+        
+        deleted_count = 0
+        for (torrent_id, name, age_hours), result in zip(stale, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to delete stale Torbox torrent {torrent_id}: {result}")
+            elif result:
+                deleted_count += 1
+                logger.info(f"Cleaned up stale Torbox torrent (stuck {age_hours:.1f}h): {name}...")
+        
         return deleted_count
     
     # ==========================================================================
@@ -352,8 +536,7 @@ class TorboxService(RateLimitedClient):
     
     async def get_usenet_list(self) -> List[Dict]:
         """Get list of user's usenet downloads"""
-        result = await self._request_api("GET", "/usenet/mylist")
-        return result if result and isinstance(result, list) else []
+        return await self._get_list_cached("/usenet/mylist")
     
     async def delete_usenet(self, usenet_id: int) -> bool:
         """Delete a usenet download"""
@@ -362,6 +545,7 @@ class TorboxService(RateLimitedClient):
             "/usenet/controlusenetdownload",
             json_data={"usenet_id": usenet_id, "operation": "delete"}
         )
+        self._invalidate_lists()
         return result is not None
     
     async def check_usenet_cached(self, hashes: List[str]) -> Dict[str, bool]:
@@ -372,27 +556,11 @@ class TorboxService(RateLimitedClient):
         if not hashes:
             return {}
         
-        cached_status = {}
+        unique = list(dict.fromkeys(hashes))
         
-        for hash_val in hashes:
-            result = await self._request_api(
-                "GET",
-                "/usenet/checkcached",
-                params={"hash": hash_val}
-            )
-            
-            is_cached = False
-            if result:
-                if isinstance(result, list) and len(result) > 0:
-                    is_cached = True
-                elif isinstance(result, dict) and result.get(hash_val) is True:
-                    is_cached = True
-                elif result is True:
-                    is_cached = True
-            
-            cached_status[hash_val] = is_cached
+        cached_status = await self._check_cached("/usenet/checkcached", unique)
         
-        cached_count = sum(1 for v in cached_status.values() if v)
+        cached_count = sum(cached_status.values())  # bools sum as ints
         logger.debug(f"Torbox: {cached_count}/{len(hashes)} usenet downloads cached")
         
         return cached_status
@@ -405,17 +573,11 @@ class TorboxService(RateLimitedClient):
         if file_id:
             params["file_id"] = file_id
         
-        result = await self._request_api("GET", "/usenet/requestdl", params=params)
-        
-        if isinstance(result, str):
-            return result
-        elif result and "url" in result:
-            return result["url"]
-        
-        return None
+        return await self._request_link("/usenet/requestdl", params)
     
     async def close(self):
-        """Close HTTP client"""
+        """Close HTTP clients"""
+        await self._dl_client.aclose()
         await super().close()
 
 
@@ -2,13 +2,102 @@
 Mount Scanner Service
 Scans the rclone mount for existing media files and matches them to episodes.
 """
+import asyncio
+import os
+import time
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 from difflib import SequenceMatcher
+from functools import lru_cache
 import re
+import PTN
 from loguru import logger
 
 from src.config import settings
+from src.services.filesystem.scandir import scandir_walk
+
+
+# Compiled once; these run for every folder/file in the mount
+_NORMALIZE_RE = re.compile(r'[^a-z0-9\s]')
+_SE_RE = re.compile(r's(\d{1,2})e(\d{1,4})')  # S01E001 or S1E1
+_XE_RE = re.compile(r'(\d{1,2})x(\d{1,4})')  # 1x01
+_SEASON_EP_RE = re.compile(r'season\s*(\d+).*?episode\s*(\d+)')  # Season X ... Episode Y
+_ABS_RE = re.compile(r'(?:^|[\[\s\-\.])(\d{2,4})(?:[\]\s\.\-]|\.mkv|\.mp4|$)')  # " - 0001", "[0001]", ".0001."
+
+
+def _iter_video_entries(root: str, extensions: Tuple[str, ...]) -> Iterator[os.DirEntry]:
+    """
+    Recursively yield video files under root as DirEntry objects.
+    scandir reports file types from the directory listing itself, so unlike
+    rglob + is_file() this doesn't stat every entry on the (network) mount.
+    """
+    for entry in scandir_walk(root):
+        if not entry.is_dir(follow_symlinks=False) and entry.name.lower().endswith(extensions) and entry.is_file():
+            yield entry
+
+
+# Ignored trash folders
+_IGNORED_FOLDERS = frozenset({"sample", "extras", "featurettes"})
+
+
+def _normalize(title: str) -> str:
+    """Normalize title for comparison"""
+    # Remove special characters, convert to lowercase
+    return _NORMALIZE_RE.sub('', title.lower()).strip()
+
+
+@lru_cache(maxsize=16384)
+def _folder_title(folder_name: str) -> Tuple[str, str]:
+    """
+    Parse a mount folder name into (release title, normalized title).
+    Depends only on the name, so it's memoized across show lookups instead of
+    re-running PTN.parse over every folder for every query.
+    """
+    # e.g. "Araiguma.Calcal-dan.S01E21..." -> title="Araiguma Calcal-dan"
+    title_raw = PTN.parse(folder_name).get("title")
+    if not title_raw:
+        # Fallback if PTN fails: use the folder name excluding dots
+        title_raw = folder_name.replace(".", " ")
+    return title_raw, _normalize(title_raw)
+
+
+@lru_cache(maxsize=8192)
+def _parse_season_episode(filename: str) -> Optional[Tuple[int, int]]:
+    """
+    Extract S01E01 or absolute episode number from filename.
+    Patterns are tried in priority order (not fused into one alternation, which
+    would pick the leftmost match, e.g. a year before S01E02). Memoized since the
+    same files are re-scanned for every show lookup.
+    """
+    filename_lower = filename.lower()
+    
+    # Pattern 1: S01E001 or S1E1
+    match = _SE_RE.search(filename_lower)
+    if match:
+        return int(match.group(1)), int(match.group(2))
+    
+    # Pattern 2: 1x01
+    match = _XE_RE.search(filename_lower)
+    if match:
+        return int(match.group(1)), int(match.group(2))
+    
+    # Pattern 3: Season X ... Episode Y
+    match = _SEASON_EP_RE.search(filename_lower)
+    if match:
+        return int(match.group(1)), int(match.group(2))
+    
+    # Pattern 4: Absolute numbering - " - 0001" or "[0001]" or ".0001."
+    # Common in anime: "One Piece - 0837.mkv"
+    match = _ABS_RE.search(filename_lower)
+    if match:
+        episode_num = int(match.group(1))
+        # Sanity check: absolute numbers are usually > 0 and reasonable
+        if 1 <= episode_num <= 9999:
+            # For absolute numbering, we'll return season 1 and the absolute number
+            # The caller can convert to proper season/episode if needed
+            return 1, episode_num
+    
+    return None
 
 
 class MountScanner:
@@ -17,91 +106,112 @@ class MountScanner:
     Handles season packs, batch releases, and individual episodes.
     """
     
+    MOUNT_PROBE_TIMEOUT = 5.0  # seconds before a hung mount is reported unavailable
+    MOUNT_CHECK_TTL = 10.0  # seconds to reuse the last probe result
+    MOUNT_SCAN_TIMEOUT = 30.0  # seconds before a folder listing/scan on a hung mount is abandoned
+    
     def __init__(self):
         self.mount_path = Path(settings.mount_path)
         self.video_extensions = {'.mkv', '.mp4', '.avi', '.m4v', '.mov'}
+        self._video_ext_tuple = tuple(self.video_extensions)  # for str.endswith
+        self._mount_state: Optional[Tuple[float, bool]] = None  # (checked_at, available)
+        # Last probe's thread; a hung mount keeps it blocked, so never start a second one
+        self._probe_future: Optional[asyncio.Future] = None
     
-    def find_matching_folders(self, show_title: str) -> List[Path]:
+    async def find_matching_folders(self, show_title: str) -> List[Path]:
         """
         Find all folders that match a show title using PTN (Parse Torrent Name).
         This mimics 'Riven-style' matching by extracting the clean title from the folder first.
+        Each search subdir is listed in its own thread so slow mount I/O overlaps
+        and doesn't block the event loop.
         """
-        from difflib import SequenceMatcher
-        import PTN
-        
-        folders = []
         # Normalize the requested show title (e.g. "Dan Da Dan" -> "dandadan")
         target_clean = self._normalize_title(show_title)
+        if not target_clean:
+            return []
         
-        # Ignored trash words
-        ignore_words = {"sample", "extras", "featurettes"}
+        try:
+            results = await asyncio.wait_for(asyncio.gather(*[
+                asyncio.to_thread(self._match_in_subdir, subdir, target_clean)
+                for subdir in ("__all__", "anime", "shows")
+            ]), self.MOUNT_SCAN_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"Folder search for '{show_title}' timed out after {self.MOUNT_SCAN_TIMEOUT:.0f}s")
+            return []
+        return [folder for matches in results for folder in matches]
+    
+    def _match_in_subdir(self, subdir: str, target_clean: str) -> List[Path]:
+        """Blocking scan of one mount subdir for folders matching target_clean"""
+        matches = []
+        search_path = self.mount_path / subdir
+        if not search_path.exists():
+            return matches
         
-        for subdir in ["__all__", "anime", "shows"]:
-            search_path = self.mount_path / subdir
-            if not search_path.exists():
-                continue
-            
-            try:
-                for item in search_path.iterdir():
-                    if not item.is_dir():
-                        continue
-                    
-                    if item.name.lower() in ignore_words:
-                        continue
-                        
-                    # 1. Parse the folder name to get the "release title"
-                    # e.g. "Araiguma.Calcal-dan.S01E21..." -> title="Araiguma Calcal-dan"
-                    parsed = PTN.parse(item.name)
-                    folder_title_raw = parsed.get("title")
-                    
-                    if not folder_title_raw:
-                        # Fallback if PTN fails: use the folder name excluding dots
-                        folder_title_raw = item.name.replace(".", " ")
+        try:
+            for item in search_path.iterdir():
+                if not item.is_dir():
+                    continue
+                
+                if item.name.lower() in _IGNORED_FOLDERS:
+                    continue
                     
-                    # 2. Normalize the parsed title (e.g. "Araiguma Calcal-dan" -> "araigumacalcaldan")
-                    folder_clean = self._normalize_title(folder_title_raw)
+                # 1-2. Parse the folder name to get the "release title" and normalize it
+                # (e.g. "Araiguma.Calcal-dan.S01E21..." -> "araiguma calcaldan"), cached per name
+                folder_title_raw, folder_clean = _folder_title(item.name)
+                
+                # 3. Compare the CLEAN titles
+                # Now we compare "dandadan" vs "araigumacalcaldan" -> clearly NO match
+                if not folder_clean:
+                    continue
                     
-                    # 3. Compare the CLEAN titles
-                    # Now we compare "dandadan" vs "araigumacalcaldan" -> clearly NO match
-                    if not folder_clean or not target_clean:
-                        continue
-                        
-                    # Calculate similarity ratio
-                    ratio = SequenceMatcher(None, target_clean, folder_clean).ratio()
+                # Also allow startswith for "The Office" matching "The Office US" situations
+                prefix_match = len(target_clean) > 4 and folder_clean.startswith(target_clean)
+                
+                # Cheap upper bounds first: if even these can't clear the threshold,
+                # the full ratio() can't either, so skip the expensive comparison
+                matcher = SequenceMatcher(None, target_clean, folder_clean)
+                if not prefix_match and (matcher.real_quick_ratio() <= 0.85 or matcher.quick_ratio() <= 0.85):
+                    continue
+                
+                # Calculate similarity ratio
+                ratio = matcher.ratio()
+                
+                # Strict threshold (0.9) because we are comparing "clean vs clean" title
+                if ratio > 0.85 or prefix_match:
+                    matches.append(item)
+                    logger.debug(f"Matched folder: {item.name} | Parsed: '{folder_title_raw}' | Ratio: {ratio:.2f}")
                     
-                    # Strict threshold (0.9) because we are comparing "clean vs clean" title
-                    # Also allow startswith for "The Office" matching "The Office US" situations
-                    if ratio > 0.85 or (len(target_clean) > 4 and folder_clean.startswith(target_clean)):
-                        folders.append(item)
-                        logger.debug(f"Matched folder: {item.name} | Parsed: '{folder_title_raw}' | Ratio: {ratio:.2f}")
-                        
-            except Exception as e:
-                logger.error(f"Error scanning {search_path}: {e}")
+        except Exception as e:
+            logger.error(f"Error scanning {search_path}: {e}")
         
-        return folders
+        return matches
     
     def scan_folder_for_episodes(self, folder: Path) -> Dict[Tuple[int, int], Path]:
         """
         Scan a folder and extract episode mappings.
         Returns: {(season, episode): file_path}
         """
+        return {key: path for key, (path, _) in self._scan_folder_sized(folder).items()}
+    
+    def _scan_folder_sized(self, folder: Path) -> Dict[Tuple[int, int], Tuple[Path, int]]:
+        """
+        Like scan_folder_for_episodes, but keeps each file's size next to its path
+        so callers comparing sizes don't stat() again (a network round-trip on rclone).
+        Returns: {(season, episode): (file_path, size)}
+        """
         episodes = {}
         
         try:
-            for file in folder.rglob("*"):
-                if not file.is_file():
-                    continue
-                if file.suffix.lower() not in self.video_extensions:
-                    continue
-                
+            for entry in _iter_video_entries(str(folder), self._video_ext_tuple):
                 # Try to extract season/episode from filename
-                se = self._extract_season_episode(file.name)
+                se = self._extract_season_episode(entry.name)
                 if se:
                     season, episode = se
                     # Store mapping, prefer larger files (better quality)
                     key = (season, episode)
-                    if key not in episodes or file.stat().st_size > episodes[key].stat().st_size:
-                        episodes[key] = file
+                    size = entry.stat().st_size
+                    if key not in episodes or size > episodes[key][1]:
+                        episodes[key] = (Path(entry.path), size)
         except Exception as e:
             logger.error(f"Error scanning folder {folder}: {e}")
         
@@ -109,77 +219,80 @@ class MountScanner:
     
     def _extract_season_episode(self, filename: str) -> Optional[Tuple[int, int]]:
         """Extract S01E01 or absolute episode number from filename"""
-        filename_lower = filename.lower()
-        
-        # Pattern 1: S01E001 or S1E1
-        match = re.search(r's(\d{1,2})e(\d{1,4})', filename_lower)
-        if match:
-            return int(match.group(1)), int(match.group(2))
-        
-        # Pattern 2: 1x01
-        match = re.search(r'(\d{1,2})x(\d{1,4})', filename_lower)
-        if match:
-            return int(match.group(1)), int(match.group(2))
-        
-        # Pattern 3: Season X ... Episode Y
-        match = re.search(r'season\s*(\d+).*?episode\s*(\d+)', filename_lower)
-        if match:
-            return int(match.group(1)), int(match.group(2))
-        
-        # Pattern 4: Absolute numbering - " - 0001" or "[0001]" or ".0001."
-        # Common in anime: "One Piece - 0837.mkv"
-        match = re.search(r'(?:^|[\[\s\-\.])(\d{2,4})(?:[\]\s\.\-]|\.mkv|\.mp4|$)', filename_lower)
-        if match:
-            episode_num = int(match.group(1))
-            # Sanity check: absolute numbers are usually > 0 and reasonable
-            if 1 <= episode_num <= 9999:
-                # For absolute numbering, we'll return season 1 and the absolute number
-                # The caller can convert to proper season/episode if needed
-                return 1, episode_num
-        
-        return None
+        return _parse_season_episode(filename)
     
-    def find_all_episodes_for_show(self, show_title: str) -> Dict[Tuple[int, int], Path]:
+    async def find_all_episodes_for_show(self, show_title: str) -> Dict[Tuple[int, int], Path]:
         """
         Main entry point: Find ALL available episodes for a show.
-        Searches all matching folders and aggregates results.
+        Searches all matching folders (in worker threads) and aggregates results.
         """
-        all_episodes = {}
+        all_episodes: Dict[Tuple[int, int], Tuple[Path, int]] = {}
         
         try:
-            folders = self.find_matching_folders(show_title)
+            folders = await self.find_matching_folders(show_title)
             
             if folders:
                 logger.info(f"Found {len(folders)} potential folders for '{show_title}'")
             
-            for folder in folders:
-                folder_episodes = self.scan_folder_for_episodes(folder)
+            scans = await asyncio.wait_for(
+                asyncio.gather(*[asyncio.to_thread(self._scan_folder_sized, f) for f in folders]),
+                self.MOUNT_SCAN_TIMEOUT
+            )
+            
+            for folder, folder_episodes in zip(folders, scans):
                 
                 if folder_episodes:
                     logger.info(f"  📁 {folder.name}: {len(folder_episodes)} episodes")
                 
-                # Merge results, preferring larger files
-                for key, path in folder_episodes.items():
-                    if key not in all_episodes:
-                        all_episodes[key] = path
-                    elif path.stat().st_size > all_episodes[key].stat().st_size:
-                        all_episodes[key] = path
+                # Merge results, preferring larger files (sizes came from the scan)
+                for key, entry in folder_episodes.items():
+                    if key not in all_episodes or entry[1] > all_episodes[key][1]:
+                        all_episodes[key] = entry
             
             if all_episodes:
                 logger.success(f"Total: Found {len(all_episodes)} existing episodes for '{show_title}'")
                 
+        except asyncio.TimeoutError:
+            logger.warning(f"Episode scan for '{show_title}' timed out after {self.MOUNT_SCAN_TIMEOUT:.0f}s")
+            return {}
         except Exception as e:
             logger.error(f"Error scanning mount for {show_title}: {e}")
         
-        return all_episodes
+        return {key: path for key, (path, _) in all_episodes.items()}
     
     def _normalize_title(self, title: str) -> str:
         """Normalize title for comparison"""
-        # Remove special characters, convert to lowercase
-        return re.sub(r'[^a-z0-9\s]', '', title.lower()).strip()
+        return _normalize(title)
+    
+    async def check_mount_available(self) -> bool:
+        """
+        Check if the mount is accessible.
+        The probe runs in a thread with a timeout so a hung rclone mount can't
+        block the event loop, and the result is reused for MOUNT_CHECK_TTL.
+        While an earlier probe is still stuck, the mount is reported unavailable
+        instead of tying up another worker thread.
+        """
+        now = time.monotonic()
+        if self._mount_state and now - self._mount_state[0] < self.MOUNT_CHECK_TTL:
+            return self._mount_state[1]
+        
+        if self._probe_future is not None and not self._probe_future.done():
+            logger.debug("Mount not available: previous probe still blocked")
+            return False
+        
+        self._probe_future = asyncio.get_running_loop().run_in_executor(None, self._probe_mount)
+        try:
+            # shield: a timeout must not drop our handle on the still-running thread
+            available = await asyncio.wait_for(asyncio.shield(self._probe_future), self.MOUNT_PROBE_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"Mount not available: probe timed out after {self.MOUNT_PROBE_TIMEOUT:.0f}s")
+            available = False
+        
+        self._mount_state = (time.monotonic(), available)
+        return available
     
-    def check_mount_available(self) -> bool:
-        """Check if the mount is accessible"""
+    def _probe_mount(self) -> bool:
+        """Blocking mount check (run via check_mount_available)"""
         try:
             all_folder = self.mount_path / "__all__"
             if all_folder.exists():
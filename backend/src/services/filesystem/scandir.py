@@ -0,0 +1,25 @@
+"""
+Shared directory walker for the mount.
+DirEntry carries the file type from the directory read, so walking with
+os.scandir avoids the per-entry stat() that rglob + is_file() costs on the FUSE mount.
+"""
+import os
+from typing import Iterator
+from loguru import logger
+
+
+def scandir_walk(root: str) -> Iterator[os.DirEntry]:
+    """
+    Recursively yield every entry under root.
+    Symlinked directories are not descended into, matching rglob.
+    Unreadable subdirectories are skipped (logged at debug), as rglob does;
+    an unreadable root raises.
+    """
+    with os.scandir(root) as it:
+        for entry in it:
+            yield entry
+            if entry.is_dir(follow_symlinks=False):
+                try:
+                    yield from scandir_walk(entry.path)
+                except PermissionError as e:
+                    logger.debug(f"Skipping unreadable directory {entry.path}: {e}")
@@ -4,8 +4,10 @@ Handles symlink creation and media organization
 """
 import os
 import re
+import time
+from fnmatch import fnmatchcase
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from loguru import logger
 
 try:
@@ -16,11 +18,25 @@ except ImportError:
 
 from src.config import settings
 from src.models import MediaItem, MediaType
+from src.services.filesystem.scandir import scandir_walk
+
+
+# Compiled once; the title matchers run these for every entry in the mount
+_NON_ALNUM_RE = re.compile(r'[^a-zA-Z0-9\s]')
+_YEAR_RE = re.compile(r'(19|20)\d{2}')
+_INVALID_CHARS_RE = re.compile(r'[<>:"/\\|?*]')
+_MULTI_WS_RE = re.compile(r'\s+')
+
+# Mount subdirs searched by find_by_infohash / find_by_title, in priority order
+_SEARCH_SUBDIRS = ("movies", "shows", "anime", "__all__")
 
 
 class SymlinkService:
     """Service for creating and managing symlinks to mounted media"""
     
+    # Upper bound on reusing a mount listing; rclone/Zurg don't always bump dir mtimes
+    LISTING_CACHE_TTL = 30.0
+    
     def __init__(self):
         self.mount_path = Path(settings.mount_path)
         self.symlink_path = Path(settings.symlink_path)
@@ -32,6 +48,9 @@ class SymlinkService:
             MediaType.ANIME_MOVIE: self.symlink_path / "anime_movies",
             MediaType.ANIME_SHOW: self.symlink_path / "anime_shows",
         }
+        
+        # dir -> (mtime_ns, listed_at, [(name, name_lower, name_clean, is_dir), ...])
+        self._listing_cache: Dict[str, Tuple[int, float, List[Tuple[str, str, str, bool]]]] = {}
     
     def ensure_directories(self):
         """Create all required directories"""
@@ -48,37 +67,84 @@ class SymlinkService:
             logger.warning(f"Mount path does not exist: {self.mount_path}")
             return None
         
-        # Search recursively
-        matches = list(self.mount_path.rglob(f"*{filename_pattern}*"))
+        # Search recursively (same glob semantics as rglob)
+        pattern = f"*{filename_pattern}*"
+        matches = [e for e in scandir_walk(str(self.mount_path)) if fnmatchcase(e.name, pattern)]
         
         if not matches:
             return None
         
         # Return largest file if multiple matches
         if len(matches) > 1:
-            matches.sort(key=lambda p: p.stat().st_size if p.is_file() else 0, reverse=True)
+            matches.sort(key=lambda e: e.stat().st_size if e.is_file() else 0, reverse=True)
         
-        return matches[0]
+        return Path(matches[0].path)
+    
+    def _cached_listing(self, directory: Path) -> List[Tuple[str, str, str, bool]]:
+        """
+        Top-level (name, name_lower, name_clean, is_dir) entries of a mount directory.
+        name_clean is the lowercased name with non-alphanumerics blanked, as find_by_title
+        compares it. Reused while the directory's mtime is unchanged, for at most
+        LISTING_CACHE_TTL, so a batch of lookups lists and cleans each subdir once.
+        """
+        key = str(directory)
+        mtime = os.stat(key).st_mtime_ns
+        now = time.monotonic()
+        
+        cached = self._listing_cache.get(key)
+        if cached and cached[0] == mtime and now - cached[1] < self.LISTING_CACHE_TTL:
+            return cached[2]
+        
+        with os.scandir(key) as it:
+            listing = []
+            for entry in it:
+                name_lower = entry.name.lower()
+                listing.append((entry.name, name_lower, _NON_ALNUM_RE.sub(' ', name_lower), entry.is_dir()))
+        self._listing_cache[key] = (mtime, now, listing)
+        return listing
     
     def find_by_infohash(self, info_hash: str, title: str = None, year: int = None) -> Optional[Path]:
         """
         Find file by searching in mount.
         First tries to match by info hash, then falls back to title search.
+        On a miss, any listing served from cache is re-read and the search repeated,
+        since rclone/Zurg don't always bump mtimes when a new folder appears.
         """
+        started = time.monotonic()
+        found = self._search_infohash(info_hash, title, year)
+        if found:
+            return found
+        
+        stale = [
+            key for key in (str(self.mount_path / subdir) for subdir in _SEARCH_SUBDIRS)
+            if key in self._listing_cache and self._listing_cache[key][1] < started
+        ]
+        if not stale:
+            return None
+        
+        for key in stale:
+            del self._listing_cache[key]
+        logger.debug(f"No match for {info_hash[:8]} in cached listings, re-listing {len(stale)} dirs")
+        return self._search_infohash(info_hash, title, year)
+    
+    def _search_infohash(self, info_hash: str, title: Optional[str], year: Optional[int]) -> Optional[Path]:
+        """One pass of find_by_infohash over the (possibly cached) mount listings"""
         # First try by hash (rarely works with Zurg)
-        for subdir in ["movies", "shows", "anime", "__all__"]:
+        hash_lower = info_hash.lower()
+        for subdir in _SEARCH_SUBDIRS:
             search_path = self.mount_path / subdir
             if not search_path.exists():
                 continue
             
-            for item in search_path.iterdir():
-                if info_hash.lower() in item.name.lower():
-                    if item.is_file():
-                        return item
-                    elif item.is_dir():
+            for name, name_lower, _, is_dir in self._cached_listing(search_path):
+                if hash_lower in name_lower:
+                    item = search_path / name
+                    if is_dir:
                         video_files = self._find_video_files(item)
                         if video_files:
                             return video_files[0]
+                    elif item.is_file():
+                        return item
         
         # If title provided, search by title (with year for better matching)
         if title:
@@ -94,10 +160,8 @@ class SymlinkService:
         if not title:
             return None
         
-        import re
-        
         # Clean title - remove special chars and make lowercase
-        clean_title = re.sub(r'[^a-zA-Z0-9\s]', ' ', title.lower())
+        clean_title = _NON_ALNUM_RE.sub(' ', title.lower())
         words = clean_title.split()
         
         # Skip common words
@@ -113,18 +177,22 @@ class SymlinkService:
         year_str = str(year) if year else None
         logger.info(f"Searching mount for: {keywords} (year: {year_str})")
         
-        # Collect all matches with scores
-        matches = []
+        # Highest score any item can reach; the first resolvable item hitting it would
+        # win the (stable) sort below anyway, so we can stop scanning right there
+        perfect_score = 10 * len(keywords) + (50 if year_str else 0)
+        
+        # Collect all candidates with scores; resolving a folder to its video file walks
+        # the folder, so that's deferred until a candidate could actually win
+        candidates = []
         
         # Search all subdirs
-        for subdir in ["movies", "shows", "anime", "__all__"]:
+        for subdir in _SEARCH_SUBDIRS:
             search_path = self.mount_path / subdir
             if not search_path.exists():
                 continue
             
-            for item in search_path.iterdir():
-                # Clean item name same way
-                item_name_clean = re.sub(r'[^a-zA-Z0-9\s]', ' ', item.name.lower())
+            # Item names come pre-cleaned the same way from the listing cache
+            for name, _, item_name_clean, _ in self._cached_listing(search_path):
                 
                 # Check if at least first 2 important keywords are present
                 min_keywords = keywords[:2] if len(keywords) > 1 else keywords
@@ -140,32 +208,45 @@ class SymlinkService:
                         score += 10
                 
                 # +50 for year match (critical for series like Harry Potter)
-                if year_str and year_str in item.name:
+                if year_str and year_str in name:
                     score += 50
                 
                 # -20 penalty if year is wrong
                 elif year:
-                    year_match = re.search(r'(19|20)\d{2}', item.name)
+                    year_match = _YEAR_RE.search(name)
                     if year_match and year_match.group() != year_str:
                         score -= 20
                 
-                if item.is_file():
-                    matches.append((score, item, None))
-                elif item.is_dir():
-                    video_files = self._find_video_files(item)
-                    if video_files:
-                        matches.append((score, item, video_files[0]))
-        
-        if not matches:
-            logger.warning(f"No match found for: {title} ({year})")
-            return None
+                item = search_path / name
+                if score >= perfect_score:
+                    resolved = self._resolve_match(item)
+                    if resolved:
+                        logger.info(f"Found match: {item.name} (score: {score})")
+                        return resolved
+                    continue
+                
+                candidates.append((score, item))
         
-        # Sort by score (highest first) and return best match
-        matches.sort(key=lambda x: x[0], reverse=True)
-        best_score, best_folder, best_file = matches[0]
+        # Sort by score (highest first) and return the best one that holds a video
+        candidates.sort(key=lambda x: x[0], reverse=True)
+        for score, item in candidates:
+            resolved = self._resolve_match(item)
+            if resolved:
+                logger.info(f"Found match: {item.name} (score: {score})")
+                return resolved
         
-        logger.info(f"Found match: {best_folder.name} (score: {best_score})")
-        return best_file if best_file else best_folder
+        logger.warning(f"No match found for: {title} ({year})")
+        return None
+    
+    def _resolve_match(self, item: Path) -> Optional[Path]:
+        """Return the file itself, or the largest video inside a folder (None if it has none)"""
+        if item.is_file():
+            return item
+        if item.is_dir():
+            video_files = self._find_video_files(item)
+            if video_files:
+                return video_files[0]
+        return None
     
     async def find_episode_in_torrent(self, torrent_name: str, season: int, episode: int, 
                               absolute_episode_number: Optional[int] = None) -> Optional[Path]:
@@ -525,11 +606,11 @@ class SymlinkService:
                                 break
                 else:
                     # PTN failed - fallback to strict word matching
-                    clean_item = re.sub(r'[^a-zA-Z0-9\s]', ' ', item_name_lower)
+                    clean_item = _NON_ALNUM_RE.sub(' ', item_name_lower)
                     clean_item_words = set(clean_item.split())
                     
                     for title in titles_to_try:
-                        clean_title = re.sub(r'[^a-zA-Z0-9\s]', ' ', title.lower())
+                        clean_title = _NON_ALNUM_RE.sub(' ', title.lower())
                         title_words = [w for w in clean_title.split() if len(w) > 2]
                         
                         if not title_words:
@@ -602,11 +683,11 @@ class SymlinkService:
                             logger.debug(f"PTN parsing failed for {filename}: {e}")
                     
                     # Fallback to word matching if PTN fails
-                    clean_fn = re.sub(r'[^a-zA-Z0-9\s]', ' ', filename.lower())
+                    clean_fn = _NON_ALNUM_RE.sub(' ', filename.lower())
                     fn_words = set(clean_fn.split())
                     
                     for title in titles_to_try:
-                        clean_t = re.sub(r'[^a-zA-Z0-9\s]', ' ', title.lower())
+                        clean_t = _NON_ALNUM_RE.sub(' ', title.lower())
                         t_words = [w for w in clean_t.split() if len(w) > 3]
                         
                         if not t_words:
@@ -663,14 +744,14 @@ class SymlinkService:
         video_extensions = {'.mkv', '.mp4', '.avi', '.mov', '.wmv', '.m4v'}
         
         video_files = [
-            f for f in directory.rglob("*")
-            if f.is_file() and f.suffix.lower() in video_extensions
+            e for e in scandir_walk(str(directory))
+            if os.path.splitext(e.name)[1].lower() in video_extensions and e.is_file()
         ]
         
-        # Sort by size, largest first
-        video_files.sort(key=lambda p: p.stat().st_size, reverse=True)
+        # Sort by size, largest first (DirEntry caches the stat)
+        video_files.sort(key=lambda e: e.stat().st_size, reverse=True)
         
-        return video_files
+        return [Path(e.path) for e in video_files]
     
     def _extract_season_from_name(self, name: str) -> Optional[int]:
         """Extract season number from folder/file name, if present"""
@@ -880,9 +961,9 @@ class SymlinkService:
     def _clean_filename(self, name: str) -> str:
         """Remove invalid characters from filename"""
         # Remove characters that are invalid in filenames
-        clean = re.sub(r'[<>:"/\\|?*]', '', name)
+        clean = _INVALID_CHARS_RE.sub('', name)
         # Replace multiple spaces with single space
-        clean = re.sub(r'\s+', ' ', clean)
+        clean = _MULTI_WS_RE.sub(' ', clean)
         # Trim whitespace
         clean = clean.strip()
         return clean
@@ -906,8 +987,7 @@ class SymlinkService:
         
         # Check if mount has any content
         try:
-            contents = list(self.mount_path.iterdir())
-            return len(contents) > 0
+            return len(self._cached_listing(self.mount_path)) > 0
         except Exception:
             return False
 